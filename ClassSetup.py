@@ -2,7 +2,7 @@
 Script Name: ClassSetup.py
 Author: Abdon Morales
 Created: December 14, 2023
-Last Modified: December 14, 2023
+Last Modified: October 15, 2026
 Version: 1.0
 
 Description:
@@ -10,7 +10,8 @@ Description:
     It presents the files in a Text-based User Interface (TUI) for selection. The selected
     course data is then used to synchronize directories in a OneDrive folder, creating new
     course directories and deleting old ones as necessary. Each course directory includes a
-    text file with course details.
+    text file with course details. GitHub responses are cached in ~/.cache/schedules/ and
+    revalidated with their ETag, so unchanged files are not downloaded again.
 
 Dependencies:
     Requires the 'requests' library for fetching data from GitHub (pip install requests).
@@ -26,138 +27,229 @@ Contact:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import curses
 from datetime import datetime
 import os
-import platform
-import re
+import sys
 import shutil  # For deleting directories
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from tui import curses_menu
+
+# Platform checks, fixed when the interpreter starts
+IS_WINDOWS = sys.platform == 'win32'
+IS_MAC = sys.platform == 'darwin'
+
+# Shared HTTP session so GitHub requests reuse pooled keep-alive connections
+SESSION = requests.Session()
+SESSION.headers.update({'Accept': 'application/vnd.github+json', 'User-Agent': 'schedules-sync'})
+SESSION.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=8))
+
+# On-disk cache of GitHub responses, keyed by URL and revalidated with their ETag
+CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'schedules', 'contents.json')
+CACHE_TTL = 5 * 60  # Seconds a cached response is reused without asking GitHub
+cache_lock = threading.Lock()
+
+# Function to load the response cache, treating a missing, corrupt or malformed file as empty
+def load_cache():
+    try:
+        with open(CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+# Function to get the cached entry for a URL, or None if it is missing or malformed
+def get_cache_entry(url):
+    with cache_lock:
+        entry = load_cache().get(url)
+    if isinstance(entry, dict) and 'body' in entry and isinstance(entry.get('fetched'), (int, float)):
+        return entry
+    return None
+
+# Function to save the response cache
+def save_cache(cache):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    tmp_file = f"{CACHE_FILE}.{threading.get_ident()}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_file, CACHE_FILE)
+
+# Function to GET a JSON URL through the cache, returning the status code and parsed body
+def fetch_json(url):
+    entry = get_cache_entry(url)
+    if entry and time.time() - entry['fetched'] < CACHE_TTL:
+        return 200, entry['body']
+
+    etag = entry.get('etag') if entry else None
+    headers = {'If-None-Match': etag} if isinstance(etag, str) else {}
+    response = SESSION.get(url, headers=headers, timeout=10)
+    if response.status_code == 304:  # Not modified, the cached body is still current
+        entry['fetched'] = time.time()
+    elif response.status_code == 200:
+        entry = {'etag': response.headers.get('ETag'), 'fetched': time.time(), 'body': response.json()}
+    else:
+        return response.status_code, None
+
+    with cache_lock:
+        cache = load_cache()
+        cache[url] = entry
+        save_cache(cache)
+    return 200, entry['body']
 
 # Function to get the list of JSON files in the Git repository
 def get_json_files_from_git():
     git_repo_api_url = 'https://api.github.com/repos/abdonmorales/schedules/contents/Spring%202024'
-    response = requests.get(git_repo_api_url)
-    if response.status_code == 200:
-        files = response.json()
+    status_code, files = fetch_json(git_repo_api_url)
+    if status_code == 200:
         return [file for file in files if file['name'].endswith('.json')]
     else:
-        raise Exception(f"Failed to get files: {response.status_code}")
+        raise Exception(f"Failed to get files: {status_code}")
 
 # TUI for selecting a JSON file
 def select_json_file(stdscr, files):
-    curses.curs_set(0)
-    cursor_position = 0
+    index = curses_menu(stdscr, "Select a JSON file for course data", files, label_fn=lambda file: file['name'])
+    return files[index]['download_url']
 
-    while True:
-        stdscr.clear()
-        height, width = stdscr.getmaxyx()
+# Function to download JSON file from a Git repository
+def download_json_from_git(url):
+    status_code, content = fetch_json(url)
+    if status_code == 200:
+        return content
+    else:
+        raise Exception(f"Failed to download file: {status_code}")
 
-        stdscr.addstr(0, 0, "Select a JSON file for course data:\n\n")
+# Function to download several JSON files concurrently over the shared session
+def download_json_files(files, max_workers=8):
+    urls = [file['download_url'] for file in files]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        contents = executor.map(download_json_from_git, urls)
+        return {file['name']: content for file, content in zip(files, contents)}
 
-        for i, file in enumerate(files):
-            if i == cursor_position:
-                stdscr.attron(curses.A_REVERSE)
-            stdscr.addstr(f"{i + 1}. {file['name']}\n")
-            if i == cursor_position:
-                stdscr.attroff(curses.A_REVERSE)
+# Function to list the subdirectories of a path by name, skipping unreadable directories as os.walk did
+def list_subdirectories(path):
+    try:
+        with os.scandir(path) as entries:
+            return sorted((e for e in entries if e.is_dir()), key=lambda e: e.name)
+    except OSError:
+        return []
 
-        stdscr.refresh()
-        key = stdscr.getch()
+# Function to find the first OneDrive folder among the subdirectories of a path
+def find_onedrive_entry(subdirs):
+    return next((e for e in subdirs if e.name.casefold().startswith('onedrive')), None)
 
-        if key in [curses.KEY_ENTER, ord('\n')]:
-            return files[cursor_position]['download_url']
-        elif key == curses.KEY_UP and cursor_position > 0:
-            cursor_position -= 1
-        elif key == curses.KEY_DOWN and cursor_position < len(files) - 1:
-            cursor_position += 1
+# Function to find the OneDrive directory, searching at most max_depth levels below base_path
+def find_onedrive_directory(base_path, max_depth=2):
+    # On macOS the synced folder lives in ~/Library/CloudStorage/OneDrive-*; elsewhere in ~/Library
+    # OneDrive keeps its settings and logs (e.g. Application Support/OneDrive), so skip the rest
+    library_path = os.path.join(base_path, 'Library')
+    if IS_MAC:
+        entry = find_onedrive_entry(list_subdirectories(os.path.join(library_path, 'CloudStorage')))
+        if entry is not None:
+            return entry.path
 
-# Function to download JSON file from a Git repository
-def download_json_from_git(url):
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise Exception(f"Failed to download file: {response.status_code}")
-
-# Function to find the OneDrive directory
-def find_onedrive_directory(base_path):
-    pattern = re.compile(r'OneDrive.*', re.IGNORECASE)
-    for root, dirs, files in os.walk(base_path):
-        for name in dirs:
-            if pattern.match(name):
-                return os.path.join(root, name)
+    queue = deque([(base_path, 1)])
+    while queue:
+        path, depth = queue.popleft()
+        subdirs = list_subdirectories(path)
+        entry = find_onedrive_entry(subdirs)
+        if entry is not None:
+            return entry.path
+        if depth < max_depth:
+            queue.extend((e.path, depth + 1) for e in subdirs
+                         if not e.is_symlink() and not (IS_MAC and e.path == library_path))
     return None
 
 # Get the base path based on the operating system
 def get_base_path():
-    os_name = platform.system()
-    if os_name == 'Windows':
+    if IS_WINDOWS:
         return os.environ['USERPROFILE']
-    elif os_name == 'Darwin':  # macOS
+    elif IS_MAC:
         return os.path.expanduser('~')
     else:
         raise Exception("Unsupported operating system")
 
 # Function to determine the upcoming semester based on the date
+# (January-May prepares Summer, June-October prepares Fall, November-December prepares next Spring)
+UPCOMING_SEMESTER = ('Summer',) * 5 + ('Fall',) * 5 + ('Spring',) * 2
+
 def determine_semester():
-    month = datetime.now().month
-    year = datetime.now().year
-    if 11 <= month <= 12:
-        return f"Spring {year + 1}"
-    elif 6 <= month <= 10:
-        return f"Fall {year}"
-    else:
-        return f"Summer {year}"
+    now = datetime.now()
+    month, year = now.month, now.year
+    return f"{UPCOMING_SEMESTER[month - 1]} {year + (month >= 11)}"
+
+print_lock = threading.Lock()  # Serializes output from the synchronize_directories threads
+
+# Function to print a line without interleaving with output from other worker threads
+def log(message):
+    with print_lock:
+        print(message)
 
 # Function to create a folder and a text file with course information
 def create_folder_with_info(path, course_info):
     if not os.path.exists(path):
         os.makedirs(path)
-        print(f"Folder created: {path}")
+        log(f"Folder created: {path}")
         # Create a text file with course information
         info_file = os.path.join(path, "course_info.txt")
+        payload = ''.join(f"{key}: {value}\n" for key, value in course_info.items())
         with open(info_file, 'w') as f:
-            for key, value in course_info.items():
-                f.write(f"{key}: {value}\n")
-        print(f"Info file created: {info_file}")
+            f.write(payload)
+        log(f"Info file created: {info_file}")
     else:
-        print(f"Folder already exists: {path}")
+        log(f"Folder already exists: {path}")
 
 # Function to get the list of existing course directories
 def get_existing_directories(path):
     if not os.path.exists(path):
         return []
-    return [d for d in os.listdir(path) if os.path.isdir(os.path.join(path, d))]
+    with os.scandir(path) as entries:
+        return [e.name for e in entries if e.is_dir()]
 
 # Function to check if a directory is empty
 def is_directory_empty(dir_path):
-    if os.path.exists(dir_path) and os.path.isdir(dir_path):
-        return not os.listdir(dir_path)
+    if os.path.isdir(dir_path):
+        with os.scandir(dir_path) as entries:
+            return next(entries, None) is None
     return True  # If the path doesn't exist or isn't a directory, treat as empty
 
+# Function to delete a course directory if it is empty
+def delete_empty_directory(dir_to_delete):
+    if is_directory_empty(dir_to_delete):
+        shutil.rmtree(dir_to_delete)  # Safely delete the directory
+        log(f"Deleted directory: {dir_to_delete}")
+    else:
+        log(f"Directory '{os.path.basename(dir_to_delete)}' is not empty and was not deleted.")
+
 # Function to synchronize directories based on new schedule
 def synchronize_directories(onedrive_path, semester_name, courses):
     semester_path = os.path.join(onedrive_path, semester_name)
-    existing_dirs = get_existing_directories(semester_path)
-    course_names = [course['coursename'] for course in courses]
-
-    # Create directories and info files for new courses
-    for course in courses:
-        course_name = course['coursename']
-        if course_name not in existing_dirs:
-            course_folder_path = os.path.join(semester_path, course_name)
-            create_folder_with_info(course_folder_path, course)
-
-    # Delete directories for courses no longer in schedule
-    for existing_dir in existing_dirs:
-        if existing_dir not in course_names:
-            dir_to_delete = os.path.join(semester_path, existing_dir)
-            if is_directory_empty(dir_to_delete):
-                shutil.rmtree(dir_to_delete)  # Safely delete the directory
-                print(f"Deleted directory: {dir_to_delete}")
+    existing_dirs = set(get_existing_directories(semester_path))
+    courses_by_name = {course['coursename']: course for course in courses}
+
+    # Names on only one side are either new courses or directories no longer in the schedule
+    changed_names = sorted(existing_dirs ^ courses_by_name.keys())
+    if not changed_names:
+        return
+
+    # The folder work is I/O-bound, so run it on threads
+    with ThreadPoolExecutor(max_workers=min(8, len(changed_names))) as executor:
+        futures = []
+        for name in changed_names:
+            path = os.path.join(semester_path, name)
+            if name in courses_by_name:
+                # Create directory and info file for the new course
+                futures.append(executor.submit(create_folder_with_info, path, courses_by_name[name]))
             else:
-                print(f"Directory '{existing_dir}' is not empty and was not deleted.")
+                # Delete directory for the course no longer in schedule
+                futures.append(executor.submit(delete_empty_directory, path))
+        done, _ = wait(futures)
+        for future in done:
+            future.result()  # Re-raise any error from the workers
 
 # Main execution
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+"""
+Script Name: tui.py
+Author: Abdon Morales
+Created: October 15, 2026
+Last Modified: October 15, 2026
+Version: 1.0
+
+Description:
+    Shared Text-based User Interface (TUI) helpers for ClassArchive.py and ClassSetup.py.
+    Provides a simple menu that lets the user pick one item from a list with the arrow
+    keys and Enter.
+
+Dependencies:
+    Uses 'curses' for the TUI, which is typically available in Unix-like environments.
+
+Contact:
+    Abdon Morales
+    abdonmorales@utexas.edu
+"""
+
+import curses
+
+
+# TUI for selecting an item from a list, returning the index of the selected item
+def curses_menu(stdscr, title, items, label_fn=str):
+    curses.curs_set(0)
+    cursor_position = 0
+
+    # Paint the whole menu, returning the terminal width it was drawn for
+    def paint():
+        stdscr.erase()
+        height, width = stdscr.getmaxyx()
+        stdscr.addnstr(0, 0, f"{title}:", width - 1)
+        for i, item in enumerate(items):
+            stdscr.addnstr(i + 2, 0, f"{i + 1}. {label_fn(item)}", width - 1)
+        stdscr.chgat(cursor_position + 2, 0, width - 1, curses.A_REVERSE)
+        return width
+
+    # Paint once; key presses only restyle the rows that change, a resize repaints everything
+    width = paint()
+    while True:
+        stdscr.refresh()
+        key = stdscr.getch()
+
+        new_position = cursor_position
+        if key in [curses.KEY_ENTER, ord('\n')]:
+            return cursor_position
+        elif key == curses.KEY_UP and cursor_position > 0:
+            new_position -= 1
+        elif key == curses.KEY_DOWN and cursor_position < len(items) - 1:
+            new_position += 1
+        elif key == curses.KEY_RESIZE:
+            width = paint()
+
+        if new_position != cursor_position:
+            stdscr.chgat(cursor_position + 2, 0, width - 1, curses.A_NORMAL)
+            stdscr.chgat(new_position + 2, 0, width - 1, curses.A_REVERSE)
+            cursor_position = new_position